@@ -1,14 +1,26 @@
 # ----- Imports ---- #
 import discord
+import asyncio
 import json
+import gzip
+import hashlib
 import os
 import requests
 import re
 import chat_exporter
 import io
+import secrets
+import statistics
+import sys
+import time
+import logging
+import queue
+import threading
 
 # ----- From imports ----- #
+from collections import Counter, OrderedDict, deque
 from datetime import datetime, timedelta, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from discord.ext import commands, tasks
 from discord.ui import Modal, TextInput, View, Button
 
@@ -19,6 +31,96 @@ def load_config():
 
 config = load_config()
 
+# ----- Logging ----- #
+log = logging.getLogger("warranty")
+digest_log = logging.getLogger("warranty.digest")
+
+def record_to_event(record):
+    event = {
+        "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="seconds"),
+        "level": record.levelname,
+        "logger": record.name,
+        "message": record.getMessage()
+    }
+    for field in ("order_id", "user_id", "command"):
+        if hasattr(record, field):
+            event[field] = getattr(record, field)
+    if record.exc_text:
+        event["exc"] = record.exc_text
+    return event
+
+class StructuredFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record_to_event(record), default=str)
+
+class EventQueueHandler(QueueHandler):
+    # Render the traceback on the calling side so the record can cross the queue without frames attached
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+class RingBufferHandler(logging.Handler):
+    def __init__(self, size):
+        super().__init__()
+        self.events = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def emit(self, record):
+        event = record_to_event(record)
+        with self.lock:
+            self.events.append(event)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.events)
+
+class DigestHandler(logging.Handler):
+    def __init__(self, max_pending):
+        super().__init__(logging.WARNING)
+        self.pending = deque(maxlen=max_pending)
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.addFilter(lambda record: record.name != digest_log.name)
+
+    def emit(self, record):
+        line = f"[{record.levelname}] {record.getMessage()}".splitlines()[0]
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append(line)
+
+    def drain(self):
+        with self.lock:
+            lines, dropped = list(self.pending), self.dropped
+            self.pending.clear()
+            self.dropped = 0
+        return lines, dropped
+
+ring_handler = RingBufferHandler(int(config.get("LOG_BUFFER_SIZE", 500)))
+digest_handler = DigestHandler(int(config.get("LOG_DIGEST_MAX_PENDING", 200)))
+
+def setup_logging():
+    log_queue = queue.SimpleQueue()
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    file_handler = RotatingFileHandler(config.get("LOG_FILE", "bot.log"), maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+    file_handler.setFormatter(StructuredFormatter())
+
+    root = logging.getLogger()
+    root.setLevel(config.get("LOG_LEVEL", "INFO"))
+    root.addHandler(EventQueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, console_handler, file_handler, ring_handler, digest_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+log_listener = setup_logging()
+
 # ----- Bot variables ----- #
 intents = discord.Intents.all()
 bot = commands.Bot(command_prefix='.', intents=intents, help_command=None)
@@ -68,190 +170,710 @@ def extract_warranty_duration(title):
     return None
 
 
+# ----- Records and caches ----- #
+class Record:
+    # Fixed-field records used instead of the nested dicts json.load returns
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for field in self.__slots__:
+            setattr(self, field, fields.get(field))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data.get(field) for field in cls.__slots__})
+
+class OrderRecord(Record):
+    __slots__ = ("order_id", "product_id", "product_title", "quantity", "total_price", "currency", "customer_email", "created_at")
+
+class VouchEntry(Record):
+    __slots__ = ("message_id", "user_id", "price", "tokens", "products")
+
+class FeedbackEntry(Record):
+    __slots__ = ("invoice_id", "score", "created_at")
+
+def approx_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, Record):
+        size += sum(approx_size(getattr(value, field)) for field in value.__slots__)
+    elif isinstance(value, dict):
+        size += sum(approx_size(key) + approx_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        size += sum(approx_size(item) for item in value)
+    return size
+
+caches = {}
+
+class BoundedCache:
+    # LRU mapping that evicts its oldest entries once the approximate size exceeds the budget.
+    # fetch_order and refresh_feedback write from worker threads, so every access holds the lock.
+    def __init__(self, name, on_evict=None):
+        self.name = name
+        self.budget = int(config.get("CACHE_BUDGET_KB", {}).get(name, 1024)) * 1024
+        self.on_evict = on_evict
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.bytes = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+        caches[name] = self
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key):
+        with self.lock:
+            record = self.entries.get(key)
+            if record is not None:
+                self.entries.move_to_end(key)
+            return record
+
+    def values(self):
+        with self.lock:
+            return list(self.entries.values())
+
+    def put(self, key, record):
+        size = approx_size(key) + approx_size(record)
+        with self.lock:
+            self.pop(key)
+            self.entries[key] = record
+            self.sizes[key] = size
+            self.bytes += size
+            while self.bytes > self.budget and len(self.entries) > 1:
+                evicted_key, evicted = self.entries.popitem(last=False)
+                self.bytes -= self.sizes.pop(evicted_key)
+                self.evictions += 1
+                if self.on_evict:
+                    self.on_evict(evicted_key, evicted)
+
+    def pop(self, key):
+        with self.lock:
+            record = self.entries.pop(key, None)
+            if record is not None:
+                self.bytes -= self.sizes.pop(key)
+            return record
+
+order_cache = BoundedCache("orders")
+feedback_cache = BoundedCache("feedback")
+feedback_cache.refreshed_at = 0.0
+# Eviction count right after the last download that fit in the budget; None once anything was dropped
+feedback_cache.complete_at = None
+
+# ----- Vouch reconciliation ----- #
+VOUCH_PRICE_TOLERANCE = 1.0
+
+def tokenize(text):
+    return frozenset(sys.intern(token) for token in re.findall(r'[a-z0-9]+', text.lower()) if len(token) > 1)
+
+def parse_vouch(message_id, user_id, content):
+    if f"<@{config['OWNER_ID']}>" not in content:
+        return None
+
+    vouch_price_match = re.search(r'\$(\d+(\.\d{1,2})?)', content)
+    if not vouch_price_match:
+        return None
+
+    return VouchEntry(
+        message_id=message_id,
+        user_id=user_id,
+        price=float(vouch_price_match.group(1)),
+        tokens=tokenize(content)
+    )
+
+class VouchLedger:
+    # Vouches are indexed by whole-dollar price bucket, product titles by token, and every
+    # vouch is linked to at most one order. Links are persisted so a vouch can never be reused.
+    def __init__(self, path):
+        self.path = path
+        data = load_json(path)
+        self.links = data.get("links", {})
+        self.unmatched_orders = data.get("unmatched_orders", {})
+        self.order_links = {link["order_id"]: message_id for message_id, link in self.links.items()}
+        self.vouches = BoundedCache("vouches", on_evict=self.unbucket)
+        self.price_buckets = {}
+        self.product_tokens = {}
+        self.jump_prefix = ""
+        self.ready = False
+        self.building = False
+        self.pending_events = []
+        self.lock = None
+
+    def save(self):
+        save_json(self.path, {"links": self.links, "unmatched_orders": self.unmatched_orders})
+
+    def index_products(self, products):
+        self.product_tokens = {}
+        for product_id, product_info in products.items():
+            for token in tokenize(product_info.get('title', '')):
+                self.product_tokens.setdefault(token, set()).add(product_id)
+        for vouch in self.vouches.values():
+            vouch.products = self.candidate_products(vouch.tokens)
+
+    def candidate_products(self, tokens):
+        hits = Counter(product_id for token in tokens for product_id in self.product_tokens.get(token, ()))
+        return frozenset(product_id for product_id, count in hits.items() if count >= 2)
+
+    def unbucket(self, message_id, vouch):
+        self.price_buckets.get(int(vouch.price), set()).discard(message_id)
+
+    def add(self, vouch):
+        self.remove(vouch.message_id, unlink=False)
+        vouch.products = self.candidate_products(vouch.tokens)
+        self.price_buckets.setdefault(int(vouch.price), set()).add(vouch.message_id)
+        self.vouches.put(vouch.message_id, vouch)
+
+    def remove(self, message_id, unlink=True):
+        vouch = self.vouches.pop(message_id)
+        if vouch:
+            self.unbucket(message_id, vouch)
+        if unlink and str(message_id) in self.links:
+            self.order_links.pop(self.links.pop(str(message_id))["order_id"], None)
+            self.save()
+
+    def jump_url(self, vouch):
+        return f"{self.jump_prefix}{vouch.message_id}"
+
+    def apply(self, message_id, vouch):
+        # Live events that arrive while history is being scanned are replayed once the scan is done
+        if self.building:
+            self.pending_events.append((message_id, vouch))
+        elif self.ready:
+            if vouch:
+                self.add(vouch)
+            else:
+                self.remove(message_id)
+
+    async def build(self, vouch_channel):
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if self.ready:
+                return
+            self.building = True
+            try:
+                self.index_products(load_json(config["PRODUCT_DIR"]))
+                self.jump_prefix = f"https://discord.com/channels/{vouch_channel.guild.id}/{vouch_channel.id}/"
+                # History comes newest first; add oldest first so the cache evicts the oldest vouches
+                vouches = [vouch async for vouch in self.parse_history(vouch_channel)]
+                for vouch in reversed(vouches):
+                    self.add(vouch)
+                self.ready = True
+            finally:
+                self.building = False
+                pending_events, self.pending_events = self.pending_events, []
+            for message_id, vouch in pending_events:
+                self.apply(message_id, vouch)
+            log.info("Indexed %s vouches from #%s", len(self.vouches), vouch_channel.name)
+
+    @staticmethod
+    async def parse_history(vouch_channel):
+        async for message in vouch_channel.history(limit=int(config.get("VOUCH_HISTORY_LIMIT", 1000))):
+            vouch = parse_vouch(message.id, message.author.id, message.content)
+            if vouch:
+                yield vouch
+
+    def find(self, order_id, user_id, product_id, product_title, total_price, exclude=()):
+        # Read-only: returns the id of the vouch that covers this order, or None. link() persists it.
+        if order_id in self.order_links:
+            message_id = self.order_links[order_id]
+            return int(message_id) if self.links[message_id]["user_id"] == user_id else None
+
+        title_tokens = tokenize(product_title)
+        candidates = []
+        bucket = int(total_price)
+        for message_id in set().union(*(self.price_buckets.get(b, ()) for b in (bucket - 1, bucket, bucket + 1))):
+            vouch = self.vouches.entries[message_id]
+            price_difference = abs(vouch.price - total_price)
+            if vouch.user_id != user_id or str(message_id) in self.links or message_id in exclude or price_difference > VOUCH_PRICE_TOLERANCE:
+                continue
+            shared_tokens = len(title_tokens & vouch.tokens)
+            if product_id not in vouch.products and shared_tokens < 2:
+                continue
+            # Best title overlap first, then closest price, then the oldest message
+            candidates.append((-shared_tokens, price_difference, message_id))
+
+        return min(candidates)[2] if candidates else None
+
+    def record_unmatched(self, order_id, user_id, product_title, total_price):
+        self.unmatched_orders[order_id] = {
+            "user_id": user_id,
+            "product": product_title,
+            "total_price": total_price,
+            "checked_at": int(datetime.now(timezone.utc).timestamp())
+        }
+        # Keep only the most recently checked orders for the report
+        limit = int(config.get("VOUCH_UNMATCHED_LIMIT", 500))
+        while len(self.unmatched_orders) > limit:
+            self.unmatched_orders.pop(min(self.unmatched_orders, key=lambda oid: self.unmatched_orders[oid]["checked_at"]))
+        self.save()
+
+    def link(self, order_id, user_id, message_id):
+        message_id = str(message_id)
+        if self.order_links.get(order_id) == message_id:
+            return
+        if message_id in self.links:
+            log.warning("Vouch %s is already linked to order %s", message_id, self.links[message_id]["order_id"], extra={"order_id": order_id, "user_id": user_id})
+            return
+        self.links[message_id] = {
+            "order_id": order_id,
+            "user_id": user_id,
+            "linked_at": int(datetime.now(timezone.utc).timestamp())
+        }
+        self.order_links[order_id] = message_id
+        self.unmatched_orders.pop(order_id, None)
+        self.save()
+
+    def unmatched_vouches(self):
+        return sorted((vouch for vouch in self.vouches.values() if str(vouch.message_id) not in self.links), key=lambda vouch: vouch.message_id)
+
+vouch_ledger = VouchLedger(config.get("VOUCH_LINKS_DIR", "vouch_links.json"))
+
+async def ensure_vouch_index(guild):
+    vouch_channel = guild.get_channel(int(config["VOUCH_CHANNEL_ID"]))
+    if vouch_channel and not vouch_ledger.ready:
+        await vouch_ledger.build(vouch_channel)
+    return vouch_channel
+
+# ----- Transcript archive ----- #
+class TranscriptArchive:
+    # Transcripts are gzip-compressed and stored once per content hash; index.json maps
+    # order ids, users and close times to those blobs.
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        os.makedirs(directory, exist_ok=True)
+        self.entries = load_json(self.index_path).get("entries", [])
+        # store and compact run in worker threads; compaction must not delete a blob mid-store
+        self.lock = threading.Lock()
+
+    def save(self):
+        # Callers hold self.lock
+        save_json(self.index_path, {"entries": self.entries})
+
+    def blob_path(self, digest):
+        return os.path.join(self.directory, f"{digest}.html.gz")
+
+    def store(self, transcript, kind, name, user_id, order_ids=(), last_message_id=None):
+        data = transcript.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        with self.lock:
+            if not os.path.exists(path):
+                with gzip.open(path, 'wb') as f:
+                    f.write(data)
+
+            entry = {
+                "hash": digest,
+                "kind": kind,
+                "name": name,
+                "user_id": user_id,
+                "order_ids": list(order_ids),
+                "closed_at": int(datetime.now(timezone.utc).timestamp()),
+                "last_message_id": last_message_id,
+                "size": os.path.getsize(path)
+            }
+            self.entries.append(entry)
+            self.save()
+        return entry
+
+    def read(self, entry):
+        with self.lock, gzip.open(self.blob_path(entry["hash"]), 'rb') as f:
+            return f.read()
+
+    def to_file(self, entry):
+        return discord.File(io.BytesIO(self.read(entry)), filename=f"{entry['name']}_transcript.html")
+
+    def find_by_order(self, order_id):
+        return next((entry for entry in reversed(self.entries) if order_id in entry["order_ids"]), None)
+
+    def find_by_user(self, user_id, kind, limit=1):
+        return [entry for entry in reversed(self.entries) if entry["user_id"] == user_id and entry["kind"] == kind][:limit]
+
+    def compact(self):
+        with self.lock:
+            cutoff = datetime.now(timezone.utc).timestamp() - int(config.get("TRANSCRIPT_RETENTION_DAYS", 90)) * 86400
+            max_bytes = int(config.get("TRANSCRIPT_MAX_MB", 200)) * 1024 * 1024
+            entries = sorted((entry for entry in self.entries if entry["closed_at"] >= cutoff), key=lambda entry: entry["closed_at"])
+
+            # Drop the oldest entries until the unique blobs fit in the size budget
+            blob_sizes = {entry["hash"]: entry["size"] for entry in entries}
+            while entries and sum(blob_sizes.values()) > max_bytes:
+                dropped = entries.pop(0)
+                if not any(entry["hash"] == dropped["hash"] for entry in entries):
+                    blob_sizes.pop(dropped["hash"], None)
+
+            removed = 0
+            for filename in os.listdir(self.directory):
+                if filename.endswith(".html.gz") and filename[:-len(".html.gz")] not in blob_sizes:
+                    os.remove(os.path.join(self.directory, filename))
+                    removed += 1
+
+            dropped_entries = len(self.entries) - len(entries)
+            self.entries = entries
+            self.save()
+            return dropped_entries, removed
+
+transcript_archive = TranscriptArchive(config.get("TRANSCRIPT_DIR", "transcripts"))
+
+# ----- Ticket channel pool ----- #
+POOL_CHANNEL_PREFIX = "🔁〢pool-"
+
+def ticket_overwrites(guild, user=None):
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(read_messages=False),
+        guild.me: discord.PermissionOverwrite(read_messages=True),
+        guild.get_member(config["OWNER_ID"]): discord.PermissionOverwrite(read_messages=True)
+    }
+    if user:
+        overwrites[user] = discord.PermissionOverwrite(read_messages=True)
+    return overwrites
+
+class TicketPool:
+    # Hidden channels created ahead of time in the ticket category. Claiming one is a single
+    # edit (name + overwrites) instead of a create call while the user waits.
+    def __init__(self):
+        self.channel_ids = deque()
+        self.claim_latency = deque(maxlen=100)
+        self.create_latency = deque(maxlen=100)
+        self.refill_task = None
+        self.discovered = False
+
+    @property
+    def size(self):
+        try:
+            return int(config.get("TICKET_POOL_SIZE", 0))
+        except (TypeError, ValueError):
+            log.warning("Invalid TICKET_POOL_SIZE %r, ticket pool disabled", config.get("TICKET_POOL_SIZE"))
+            return 0
+
+    def discard(self, channel_id):
+        if channel_id in self.channel_ids:
+            self.channel_ids.remove(channel_id)
+
+    async def refill(self, guild):
+        ticket_category = discord.utils.get(guild.categories, id=int(config["TICKET_CATEGORY_ID"]))
+        if not ticket_category or self.size <= 0:
+            return
+
+        # Pick up channels pooled before a restart; later refills only ever add channels they create
+        if not self.discovered:
+            self.channel_ids.extend(channel.id for channel in ticket_category.text_channels if channel.name.startswith(POOL_CHANNEL_PREFIX))
+            self.discovered = True
+
+        while len(self.channel_ids) < self.size:
+            channel = await ticket_category.create_text_channel(f"{POOL_CHANNEL_PREFIX}{secrets.token_hex(3)}", overwrites=ticket_overwrites(guild))
+            self.channel_ids.append(channel.id)
+
+    def schedule_refill(self, guild):
+        if self.size > 0 and (self.refill_task is None or self.refill_task.done()):
+            self.refill_task = asyncio.create_task(self.refill(guild))
+            self.refill_task.add_done_callback(self.log_refill_failure)
+
+    @staticmethod
+    def log_refill_failure(task):
+        if not task.cancelled() and task.exception():
+            log.error("Ticket pool refill failed", exc_info=task.exception())
+
+    async def claim(self, guild, name, user):
+        while self.channel_ids:
+            channel = guild.get_channel(self.channel_ids.popleft())
+            if not channel:
+                continue
+            try:
+                await channel.edit(name=name, overwrites=ticket_overwrites(guild, user))
+                return channel
+            except discord.HTTPException:
+                log.warning("Could not claim pooled channel %s, discarding it", channel.id, exc_info=True)
+                try:
+                    await channel.delete()
+                except discord.HTTPException:
+                    log.warning("Could not delete unusable pooled channel %s", channel.id)
+        return None
+
+    async def open_ticket(self, ticket_category, name, user):
+        started = time.perf_counter()
+        channel = await self.claim(ticket_category.guild, name, user)
+        if channel:
+            self.claim_latency.append(time.perf_counter() - started)
+        else:
+            channel = await ticket_category.create_text_channel(name, overwrites=ticket_overwrites(ticket_category.guild, user))
+            self.create_latency.append(time.perf_counter() - started)
+        return channel
+
+ticket_pool = TicketPool()
+
+# ----- Order verification ----- #
+def sellix_headers():
+    return {
+        'Authorization': f'Bearer {config["SELLIX_API_KEY"]}',
+        'Content-Type': 'application/json',
+    }
+
+def fetch_order(order_id):
+    order = order_cache.get(order_id)
+    if order:
+        return order, "ok"
+
+    response = requests.get(f'https://dev.sellix.io/v1/orders/{order_id}', headers=sellix_headers())
+    if response.status_code != 200:
+        log.warning("Sellix order lookup returned HTTP %s", response.status_code, extra={"order_id": order_id})
+        return None, "error"
+
+    response_data = response.json()
+    if response_data.get('status') == 404:
+        return None, "not_found"
+
+    order_data = response_data.get('data', {}).get('order', {})
+    order = OrderRecord(
+        order_id=order_id,
+        product_id=order_data.get('product_id'),
+        product_title=order_data.get('product_title', 'Unknown Product'),
+        quantity=order_data.get('quantity', 'Unknown Quantity'),
+        total_price=float(order_data.get('total', 0.0)),
+        currency=order_data.get('currency', '$'),
+        customer_email=order_data.get('customer_email', ''),
+        created_at=order_data.get('created_at')
+    )
+    order_cache.put(order_id, order)
+    return order, "ok"
+
+def refresh_feedback():
+    response = requests.get('https://dev.sellix.io/v1/feedback', headers=sellix_headers())
+    if response.status_code != 200:
+        log.warning("Sellix feedback lookup returned HTTP %s", response.status_code)
+        return None
+
+    scores = {}
+    evictions = feedback_cache.evictions
+    # Oldest first, so a full cache evicts old reviews rather than the ones just left
+    feedback_data = sorted(response.json().get('data', {}).get('feedback', []), key=lambda feedback: feedback.get('created_at') or 0)
+    for feedback in feedback_data:
+        if feedback.get('invoice_id') is None:
+            continue
+        scores[feedback['invoice_id']] = feedback.get('score')
+        feedback_cache.put(feedback['invoice_id'], FeedbackEntry(
+            invoice_id=feedback['invoice_id'],
+            score=feedback.get('score'),
+            created_at=feedback.get('created_at')
+        ))
+    feedback_cache.refreshed_at = time.monotonic()
+    feedback_cache.complete_at = feedback_cache.evictions if feedback_cache.evictions == evictions else None
+    return scores
+
+async def fetch_five_star_invoices(order_ids):
+    cached = {order_id: feedback_cache.get(order_id) for order_id in order_ids}
+    if all(feedback and feedback.score == 5 for feedback in cached.values()):
+        return set(order_ids)
+
+    # A miss can only be trusted while the cache holds the whole feed; otherwise the review may
+    # have been evicted and the feed is downloaded again right away
+    cache_complete = feedback_cache.complete_at == feedback_cache.evictions
+    refresh_interval = int(config.get("FEEDBACK_REFRESH_SECONDS", 30))
+    stale = time.monotonic() - feedback_cache.refreshed_at > refresh_interval
+    if stale or (not cache_complete and any(feedback is None for feedback in cached.values())):
+        scores = await asyncio.to_thread(refresh_feedback)
+        if scores is not None:
+            return {order_id for order_id in order_ids if scores.get(order_id) == 5}
+
+    return {order_id for order_id, feedback in cached.items() if feedback and feedback.score == 5}
+
+def get_warranty_end(completed_at, warranty_duration):
+    duration_amount, duration_type = int(warranty_duration[:-1]), warranty_duration[-1]
+    if duration_type == 'd':
+        return completed_at + timedelta(days=duration_amount)
+    elif duration_type == 'm':
+        return completed_at + timedelta(days=duration_amount * 30)
+    elif duration_type == 'y':
+        return completed_at + timedelta(days=duration_amount * 365)
+    return completed_at
+
+def verify_order(order_id, lookup, email, user_id, five_star_invoices, claimed_vouches):
+    order, status = lookup
+    if status == "not_found":
+        return None, "This order ID was not found. Please check the order ID and try again."
+    if status != "ok":
+        return None, "This order could not be checked right now. Please try again later."
+
+    product_title = order.product_title
+    quantity = order.quantity
+    total_price = order.total_price
+    completed_at = datetime.fromtimestamp(order.created_at, tz=timezone.utc)
+
+    if email.lower() != order.customer_email.lower():
+        return None, f"The provided email `{email}` does not match the one used to pay for this order."
+
+    vouch_message_id = vouch_ledger.find(order_id, user_id, order.product_id, product_title, total_price, exclude=claimed_vouches)
+    vouch_found = vouch_message_id is not None
+    if vouch_found:
+        claimed_vouches.add(vouch_message_id)
+    else:
+        vouch_ledger.record_unmatched(order_id, user_id, product_title, total_price)
+    five_star_review = order_id in five_star_invoices
+    vouch_message = f"```+rep <@{config['OWNER_ID']}> {product_title} {quantity}x ${total_price}```"
+    review_link = f"[Leave a 5-star review](https://{config['SHOP_LINK']}/invoice/{order_id})"
+
+    if not vouch_found and not five_star_review:
+        return None, f"You did not vouch or leave a 5-star review on Sellix. Please do both within 24 hours to activate your warranty:\n{vouch_message}{review_link}"
+    elif not vouch_found:
+        return None, f"You left a 5-star review on Sellix, but did not vouch in the proper format. Please vouch with the following message within 24 hours:\n{vouch_message}"
+    elif not five_star_review:
+        return None, f"You vouched in the proper format, but did not leave a 5-star review on Sellix. Please leave one within 24 hours:\n{review_link}"
+
+    warranty_duration = extract_warranty_duration(product_title)
+    if not warranty_duration:
+        return None, "Could not determine warranty duration for this product."
+
+    if datetime.now(timezone.utc) > get_warranty_end(completed_at, warranty_duration):
+        return None, f"Your warranty has expired. Warranty duration was `{warranty_duration}` and the order was completed on `{completed_at.strftime('%Y-%m-%d %H:%M:%S')}`."
+
+    return {
+        "order_id": order_id,
+        "product": product_title,
+        "quantity": quantity,
+        "total_price": total_price,
+        "currency": order.currency,
+        "created_at": order.created_at,
+        "vouch_message_id": vouch_message_id
+    }, None
+
+ORDER_ID_PATTERN = re.compile(r'[A-Za-z0-9-]{6,64}')
+
+def parse_order_ids(value):
+    tokens = list(dict.fromkeys(token for token in re.split(r'[\s,;]+', value.strip()) if token))
+    order_ids = [token for token in tokens if ORDER_ID_PATTERN.fullmatch(token)]
+    invalid_ids = [token for token in tokens if not ORDER_ID_PATTERN.fullmatch(token)]
+    return order_ids, invalid_ids
+
+def add_order_field(embed, name, value):
+    # Order ids and product titles come from user input and Sellix; keep them inside Discord's field limits
+    embed.add_field(name=name if len(name) <= 256 else name[:255] + "…", value=value if len(value) <= 1024 else value[:1023] + "…", inline=False)
+
+
 class ReplaceModal(Modal):
     def __init__(self):
         super().__init__(title="Replacement Request")
-        self.order_id = TextInput(label="Order ID", placeholder="Enter the Order ID", required=True)
+        self.order_id = TextInput(label="Order ID(s)", placeholder="Enter one or more Order IDs, separated by commas or new lines", style=discord.TextStyle.paragraph, max_length=400, required=True)
         self.email = TextInput(label="Delivery Email", placeholder="Enter the delivery email used to pay", required=True)
         self.add_item(self.order_id)
         self.add_item(self.email)
 
     async def on_submit(self, interaction: discord.Interaction):
-        order_id = self.order_id.value
-        email = self.email.value
+        order_ids, invalid_ids = parse_order_ids(self.order_id.value)
+        email = self.email.value.strip()
+        log_context = {"order_id": ",".join(order_ids), "user_id": interaction.user.id}
 
         await interaction.response.defer(ephemeral=True)
 
         try:
-            headers = {
-                'Authorization': f'Bearer {config["SELLIX_API_KEY"]}',
-                'Content-Type': 'application/json',
-            }
-            url = f'https://dev.sellix.io/v1/orders/{order_id}'
-            response = requests.get(url, headers=headers)
-
-            if response.status_code == 200:
-                response_data = response.json()
-                if response_data.get('status') == 404:
-                    error_embed = create_embed("Error", f"**The order ID `{order_id}` was not found.** Please check the order ID and try again.", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
-
-                order_data = response_data.get('data', {}).get('order', {})
-                product_title = order_data.get('product_title', 'Unknown Product')
-                product_id = order_data.get('uniqid', 'Unknown ID')
-                quantity = order_data.get('quantity', 'Unknown Quantity')
-                total_price = float(order_data.get('total', 0.0))
-                currency = order_data.get('currency', '$')
-                stored_email = order_data.get('customer_email', '')
-
-                created_at_timestamp = order_data.get('created_at')
-                completed_at = datetime.fromtimestamp(created_at_timestamp, tz=timezone.utc)
-
-                if email.lower() != stored_email.lower():
-                    error_embed = create_embed("Email Mismatch", f"**The provided email `{email}` does not match the one used to pay** for the order ID `{order_id}`.", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
-
-                review_url = 'https://dev.sellix.io/v1/feedback'
-                review_response = requests.get(review_url, headers=headers)
-
-                if review_response.status_code == 200:
-                    feedback_data = review_response.json().get('data', {}).get('feedback', [])
-                    five_star_review = any(feedback.get('invoice_id') == order_id and feedback.get('score') == 5 for feedback in feedback_data)
-                else:
-                    five_star_review = False
-
-                vouch_channel = interaction.guild.get_channel(int(config["VOUCH_CHANNEL_ID"]))
-                if not vouch_channel:
-                    error_embed = create_embed("Error", "Vouch channel not found.", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
-
-                vouch_found = False
-                async for message in vouch_channel.history(limit=1000):
-                    if message.author == interaction.user and f"<@{config['OWNER_ID']}>" in message.content:
-                        vouch_content = message.content.lower()
-                        vouch_price_match = re.search(r'\$\d+(\.\d{1,2})?', vouch_content)
-                        if vouch_price_match:
-                            vouch_price = float(vouch_price_match.group()[1:])
-                            if abs(vouch_price - total_price) <= 1.0:
-                                vouch_words = vouch_content.split()
-                                title_words = product_title.lower().split()
-                                matches = [word for word in title_words if word in vouch_words]
-                                if len(matches) >= 2:
-                                    vouch_found = True
-                                    break
-
-                if not vouch_found and not five_star_review:
-                    error_embed = create_embed("Action Required", f"You did not vouch or leave a 5-star review on Sellix. Please do both within 24 hours to activate your warranty:\n\n"
-                                                                   f"1. **Vouch** with the following message in the designated channel:\n"
-                                                                   f"```+rep <@{config['OWNER_ID']}> {product_title} {quantity}x ${total_price}```\n"
-                                                                   f"2. **Leave a 5-star review** [here](https://{config['SHOP_LINK']}/invoice/{order_id})", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
-                elif not vouch_found:
-                    error_embed = create_embed("Vouch Required", f"You left a 5-star review on Sellix, but did not vouch in the proper format. "
-                                                                 f"Please vouch with the following message within 24 hours to activate your warranty:\n\n"
-                                                                 f"```+rep <@{config['OWNER_ID']}> {product_title} {quantity}x ${total_price}```\n", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
-                elif not five_star_review:
-                    error_embed = create_embed("Review Required", f"You vouched in the proper format, but did not leave a 5-star review on Sellix. "
-                                                                  f"Please leave a 5-star review within 24 hours to activate your warranty:\n\n"
-                                                                  f"[Leave a 5-star review](https://{config['SHOP_LINK']}/invoice/{order_id})", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
-
-                warranty_duration = extract_warranty_duration(product_title)
-                if not warranty_duration:
-                    error_embed = create_embed("Error", "Could not determine warranty duration for this product.", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
-
-                duration_amount, duration_type = int(warranty_duration[:-1]), warranty_duration[-1]
-                now = datetime.now(timezone.utc)
-                if duration_type == 'd':
-                    warranty_end = completed_at + timedelta(days=duration_amount)
-                elif duration_type == 'm':
-                    warranty_end = completed_at + timedelta(days=duration_amount * 30)
-                elif duration_type == 'y':
-                    warranty_end = completed_at + timedelta(days=duration_amount * 365)
-                else:
-                    warranty_end = completed_at
+            max_orders = int(config.get("MAX_ORDERS_PER_REQUEST", 5))
+            if not order_ids and not invalid_ids or len(order_ids) + len(invalid_ids) > max_orders:
+                error_embed = create_embed("Error", f"Please enter between 1 and {max_orders} order IDs.", discord.Color.red())
+                await interaction.followup.send(embed=error_embed, ephemeral=True)
+                return
 
-                if now > warranty_end:
-                    error_embed = create_embed("Warranty Expired", f"Your warranty for the order ID `{order_id}` has expired. Warranty duration was `{warranty_duration}` and the order was completed on `{completed_at.strftime('%Y-%m-%d %H:%M:%S')}`.", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
+            vouch_channel = await ensure_vouch_index(interaction.guild)
+            if not vouch_channel:
+                error_embed = create_embed("Error", "Vouch channel not found.", discord.Color.red())
+                await interaction.followup.send(embed=error_embed, ephemeral=True)
+                return
 
-                embed = discord.Embed(
-                    title="Replacement Request",
-                    description=f"<:shield:1272633951151718410> **Order ID:** `{order_id}`\n <:user:1263827156723826770> **User:** {interaction.user.mention}",
-                    color=embed_color
-                )
-                embed.add_field(name="<:world:1263827158397227061> Product", value=product_title, inline=False)
-                embed.add_field(name="<:tool:1263827165737254933> Quantity", value=f"{quantity}x", inline=False)
-                embed.add_field(name="<:check:1263827108581605427> Total Price", value=f"{total_price} {currency}", inline=False)
-                embed.set_thumbnail(url=config["THUMBNAIL_URL"])
-                embed.set_image(url=config["IMAGE_URL"])
-                embed.set_footer(text=f" Requested by {interaction.user.name}", icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
+            # All orders share one feedback download; vouches are checked against the in-memory index
+            lookups, five_star_invoices = await asyncio.gather(
+                asyncio.gather(*(asyncio.to_thread(fetch_order, order_id) for order_id in order_ids), return_exceptions=True),
+                fetch_five_star_invoices(order_ids)
+            )
 
-                ticket_channel_name = f"🔁〢pending-{order_id}"
-                existing_channel = discord.utils.get(interaction.guild.channels, name=ticket_channel_name)
+            valid_orders = []
+            claimed_vouches = set()
+            rejected_orders = [(invalid_id[:32], "This does not look like a valid Sellix order ID.") for invalid_id in invalid_ids]
+            tickets = load_json(config["TICKET_DIR"])
+            for order_id, lookup in zip(order_ids, lookups):
+                if isinstance(lookup, Exception):
+                    log.warning("Sellix order lookup failed: %s", lookup, extra={"order_id": order_id, "user_id": interaction.user.id})
+                    lookup = (None, "error")
 
+                existing_channel = interaction.guild.get_channel(tickets[order_id]["channel_id"]) if order_id in tickets else None
                 if existing_channel:
-                    error_embed = create_embed("Ticket Exists", f"A ticket for Order ID `{order_id}` already exists: {existing_channel.mention}", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
-
-                ticket_category = discord.utils.get(interaction.guild.categories, id=int(config["TICKET_CATEGORY_ID"]))
-                if not ticket_category:
-                    error_embed = create_embed("Error", "Ticket category not found.", discord.Color.red())
-                    await interaction.followup.send(embed=error_embed, ephemeral=True)
-                    return
-
-                ticket_channel = await ticket_category.create_text_channel(
-                    ticket_channel_name,
-                    overwrites={
-                        interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                        interaction.user: discord.PermissionOverwrite(read_messages=True),
-                        interaction.guild.me: discord.PermissionOverwrite(read_messages=True),
-                        interaction.guild.get_member(config["OWNER_ID"]): discord.PermissionOverwrite(read_messages=True)
-                    }
+                    order, reason = None, f"A ticket for this order already exists: {existing_channel.mention}"
+                else:
+                    try:
+                        order, reason = verify_order(order_id, lookup, email, interaction.user.id, five_star_invoices, claimed_vouches)
+                    except Exception:
+                        log.exception("Order verification failed", extra={"order_id": order_id, "user_id": interaction.user.id})
+                        order, reason = None, "This order could not be checked right now. Please try again later."
+
+                if order:
+                    valid_orders.append(order)
+                else:
+                    rejected_orders.append((order_id, reason))
+
+            if not valid_orders:
+                error_embed = create_embed("Replacement Request Denied", "None of the provided orders are eligible for a replacement.", discord.Color.red())
+                for order_id, reason in rejected_orders:
+                    add_order_field(error_embed, f"❌ {order_id}", reason)
+                await interaction.followup.send(embed=error_embed, ephemeral=True)
+                return
+
+            ticket_category = discord.utils.get(interaction.guild.categories, id=int(config["TICKET_CATEGORY_ID"]))
+            if not ticket_category:
+                error_embed = create_embed("Error", "Ticket category not found.", discord.Color.red())
+                await interaction.followup.send(embed=error_embed, ephemeral=True)
+                return
+
+            order_list = ", ".join(f"`{order['order_id']}`" for order in valid_orders)
+            embed = discord.Embed(
+                title="Replacement Request",
+                description=f"<:shield:1272633951151718410> **Order ID:** {order_list}\n <:user:1263827156723826770> **User:** {interaction.user.mention}",
+                color=embed_color
+            )
+            for order in valid_orders:
+                add_order_field(
+                    embed,
+                    f"<:world:1263827158397227061> {order['product']}",
+                    f"✅ `{order['order_id']}`\n<:tool:1263827165737254933> **Quantity:** {order['quantity']}x\n<:check:1263827108581605427> **Total Price:** {order['total_price']} {order['currency']}"
                 )
+            for order_id, reason in rejected_orders:
+                add_order_field(embed, f"❌ {order_id}", reason)
+            embed.set_thumbnail(url=config["THUMBNAIL_URL"])
+            embed.set_image(url=config["IMAGE_URL"])
+            embed.set_footer(text=f" Requested by {interaction.user.name}", icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
+
+            ticket_channel = await ticket_pool.open_ticket(ticket_category, f"🔁〢pending-{valid_orders[0]['order_id']}", interaction.user)
 
-                tickets = load_json(config["TICKET_DIR"])
-                tickets[order_id] = {
+            tickets = load_json(config["TICKET_DIR"])
+            for order in valid_orders:
+                tickets[order["order_id"]] = {
                     "channel_id": ticket_channel.id,
                     "user_id": interaction.user.id,
-                    "order_id": order_id,
-                    "product": product_title,
-                    "quantity": quantity,
-                    "total_price": total_price,
-                    "currency": currency,
-                    "created_at": created_at_timestamp
+                    **order
                 }
-                save_json(config["TICKET_DIR"], tickets)
-
-                await ticket_channel.send(embed=embed)
+            save_json(config["TICKET_DIR"], tickets)
+            # Vouches are only tied to orders once the ticket actually exists
+            for order in valid_orders:
+                vouch_ledger.link(order["order_id"], interaction.user.id, order["vouch_message_id"])
+            ticket_pool.schedule_refill(interaction.guild)
 
-                owner = interaction.guild.get_member(config["OWNER_ID"])
-                ping_message = await ticket_channel.send(f"{owner.mention}")
-                await ping_message.delete()
+            success_embed = create_embed("Ticket Created", f"Your ticket has been created: {ticket_channel.mention}")
+            for order_id, reason in rejected_orders:
+                add_order_field(success_embed, f"❌ {order_id} (not included)", reason)
+            await interaction.followup.send(embed=success_embed, ephemeral=True)
 
-                success_embed = create_embed("Ticket Created", f"Your ticket has been created: {ticket_channel.mention}")
-                await interaction.followup.send(embed=success_embed, ephemeral=True)
+            # The user already has their answer; the ticket embed and owner ping no longer hold up the interaction
+            await ticket_channel.send(embed=embed)
 
-            else:
-                error_embed = create_embed("Error", "An unexpected error occurred while checking the order ID. Please try again later.", discord.Color.red())
-                await interaction.followup.send(embed=error_embed, ephemeral=True)
+            owner = interaction.guild.get_member(config["OWNER_ID"])
+            ping_message = await ticket_channel.send(f"{owner.mention}")
+            await ping_message.delete()
 
         except discord.errors.NotFound:
-            print("Interaction expired before response could be sent.")
-        except Exception as e:
-            print(f"An error occurred: {str(e)}")
-            error_embed = create_embed("Error", f"An unexpected error occurred: {str(e)}", discord.Color.red())
+            log.warning("Interaction expired before response could be sent", extra=log_context)
+        except Exception:
+            log.exception("Replacement request failed", extra=log_context)
+            error_embed = create_embed("Error", "An unexpected error occurred. Please try again later or contact staff.", discord.Color.red())
             await interaction.followup.send(embed=error_embed, ephemeral=True)
 
 class ReplaceView(View):
@@ -307,6 +929,8 @@ async def help(ctx, command_name: str = None):
                 name=".set vouch_channel_id <value>", value="Set the vouch channel id", inline=False
             ).add_field(
                 name=".set ticket_dir <value>", value="Set the file path for the ticket database", inline=False
+            ).add_field(
+                name=".set ticket_pool_size <value>", value="Set how many hidden ticket channels to keep ready (0 disables the pool)", inline=False
             )
             await ctx.send(embed=embed)
         else:
@@ -328,11 +952,24 @@ async def help(ctx, command_name: str = None):
                 name=".help", value="List all available commands", inline=False
             ).add_field(
                 name=".check_warr <user> <order_id>", value="Checks if the user has vouched, left a web review, and if their warranty has not expired.",inline=False
+            ).add_field(
+                name=".transcribe <user>", value="Transcribes the DMs of a user (served from the archive if nothing changed).", inline=False
+            ).add_field(
+                name=".transcript <order_id|user>", value="Sends archived ticket transcripts by order ID or user.", inline=False
+            ).add_field(
+                name=".pool_stats", value="Shows the ticket channel pool and claim vs. creation latency.", inline=False
+            ).add_field(
+                name=".vouch_report", value="Shows vouches not linked to any order and checked orders without a vouch.", inline=False
+            ).add_field(
+                name=".memory", value="Shows entry counts and approximate memory use of every cache.", inline=False
+            ).add_field(
+                name=".logs [count]", value="Shows the most recent logged events (max 25).", inline=False
 )
 
             await ctx.send(embed=embed)
-    except Exception as e:
-        await ctx.send(embed=create_embed("Error", f"An error occurred: {str(e)}", discord.Color.red()))
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
 
 @bot.command()
 async def warr(ctx):
@@ -360,8 +997,9 @@ async def warr(ctx):
 
         for embed in embeds:
             await ctx.send(embed=embed)
-    except Exception as e:
-        await ctx.send(embed=create_embed("Error", f"An error occurred: {str(e)}", discord.Color.red()))
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
 
 @bot.command()
 @is_admin_or_owner()
@@ -378,14 +1016,16 @@ async def create_warr(ctx, product_id: str = None, duration: str = None):
             "warranty_duration": duration
         }
         save_json(config["PRODUCT_DIR"], products)
+        vouch_ledger.index_products(products)
 
         embed = create_embed("Warranty Created", f"Warranty for **{product_name}** with duration **{duration}** has been created.")
         embed.set_image(url=config["IMAGE_URL"])
         await ctx.send(embed=embed)
     except commands.MissingRequiredArgument:
         await ctx.send(embed=create_embed("Error", "Missing required arguments. Usage: `.create_warr <product_id> <duration>`", discord.Color.red()))
-    except Exception as e:
-        await ctx.send(embed=create_embed("Error", f"An error occurred: {str(e)}", discord.Color.red()))
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
 
 @bot.command()
 @is_admin_or_owner()
@@ -408,8 +1048,9 @@ async def stock(ctx, product: str = None, file: discord.Attachment = None):
         await ctx.send(embed=embed)
     except commands.MissingRequiredArgument:
         await ctx.send(embed=create_embed("Error", "Missing required arguments. Usage: `.stock <product> <file>`", discord.Color.red()))
-    except Exception as e:
-        await ctx.send(embed=create_embed("Error", f"An error occurred: {str(e)}", discord.Color.red()))
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
 
 @bot.command()
 @is_admin_or_owner()
@@ -422,17 +1063,57 @@ async def transcribe(ctx, user: discord.User = None):
         dm_channel = user.dm_channel
         if dm_channel is None:
             dm_channel = await user.create_dm()
+
+        last_message_id = dm_channel.last_message_id
+        if last_message_id is None:
+            async for message in dm_channel.history(limit=1):
+                last_message_id = message.id
+
+        # Serve the archived copy while no new message has been sent since it was exported
+        cached = transcript_archive.find_by_user(user.id, "dm")
+        if cached and last_message_id is not None and cached[0]["last_message_id"] == last_message_id:
+            await ctx.send(file=await asyncio.to_thread(transcript_archive.to_file, cached[0]))
+            return
+
         transcript = await chat_exporter.export(dm_channel, limit=100)
 
         if transcript is None:
             await ctx.send(embed=create_embed("Error", "Could not export the chat. No messages found or an error occurred.", discord.Color.red()))
             return
 
-        transcript_file = discord.File(io.BytesIO(transcript.encode()), filename=f"{user.name}_transcript.html")
-        await ctx.send(file=transcript_file)
+        entry = await asyncio.to_thread(transcript_archive.store, transcript, "dm", user.name, user.id, last_message_id=last_message_id)
+        await ctx.send(file=await asyncio.to_thread(transcript_archive.to_file, entry))
+
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
+
+@bot.command()
+@is_admin_or_owner()
+async def transcript(ctx, target: str = None):
+    try:
+        if not target:
+            await ctx.send(embed=create_embed("Error", "Missing required arguments. Usage: `.transcript <order_id|user>`", discord.Color.red()))
+            return
+
+        entries = []
+        entry = transcript_archive.find_by_order(target)
+        if entry:
+            entries.append(entry)
+        else:
+            user_match = re.fullmatch(r'<@!?(\d+)>|(\d+)', target)
+            if user_match:
+                entries = transcript_archive.find_by_user(int(user_match.group(1) or user_match.group(2)), "ticket", limit=5)
+
+        if not entries:
+            await ctx.send(embed=create_embed("Error", f"No archived transcript found for `{target}`.", discord.Color.red()))
+            return
 
-    except Exception as e:
-        await ctx.send(embed=create_embed("Error", f"An error occurred: {str(e)}", discord.Color.red()))
+        files = await asyncio.to_thread(lambda: [transcript_archive.to_file(entry) for entry in entries])
+        await ctx.send(f"Found {len(files)} archived transcript(s) for `{target}`:", files=files)
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
 
 @bot.command()
 @is_admin_or_owner()
@@ -515,7 +1196,8 @@ async def replace(ctx, user: discord.User = None, amount_or_product: str = None,
                 await ticket_channel.delete()
                 await ctx.send(embed=create_embed("Ticket Closed", f"The ticket channel `{ticket_channel_name}` has been closed."))
 
-                tickets.pop(ticket_info['order_id'], None)
+                for oid in [oid for oid, info in tickets.items() if info['channel_id'] == ticket_channel.id]:
+                    tickets.pop(oid, None)
                 save_json(config["TICKET_DIR"], tickets)
             else:
                 await ctx.send(embed=create_embed("Error", f"No ticket channel found with the name `{ticket_channel_name}`.", discord.Color.red()))
@@ -524,8 +1206,9 @@ async def replace(ctx, user: discord.User = None, amount_or_product: str = None,
 
     except commands.MissingRequiredArgument:
         await ctx.send(embed=create_embed("Error", "Missing required arguments. Usage: `.replace <user> [amount] <product> [file/string]`", discord.Color.red()))
-    except Exception as e:
-        await ctx.send(embed=create_embed("Error", f"An error occurred: {str(e)}", discord.Color.red()))
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
 
 @bot.command()
 @is_admin_or_owner()
@@ -548,7 +1231,8 @@ async def set(ctx, setting: str = None, *, value: str = None):
             "replace_channel_id": "REPLACE_CHANNEL_ID",
             "ticket_category_id": "TICKET_CATEGORY_ID",
             "vouch_channel_id": "VOUCH_CHANNEL_ID",
-            "ticket_dir": "TICKET_DIR"
+            "ticket_dir": "TICKET_DIR",
+            "ticket_pool_size": "TICKET_POOL_SIZE"
         }
 
         if setting not in valid_settings:
@@ -560,6 +1244,8 @@ async def set(ctx, setting: str = None, *, value: str = None):
         try:
             if config_key == "embed_color":
                 config[config_key] = format_color(value)
+            elif config_key == "TICKET_POOL_SIZE":
+                config[config_key] = int(value)
             else:
                 config[config_key] = value
             save_json('config.json', config)
@@ -568,126 +1254,192 @@ async def set(ctx, setting: str = None, *, value: str = None):
             await ctx.send(embed=create_embed("Error", f"Invalid value for `{setting}`. Ensure the input is correct.", discord.Color.red()))
     except commands.MissingRequiredArgument:
         await ctx.send(embed=create_embed("Error", "Missing required arguments. Usage: `.set <setting> <value>`", discord.Color.red()))
-    except Exception as e:
-        await ctx.send(embed=create_embed("Error", f"An error occurred: {str(e)}", discord.Color.red()))
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
 
 
 @bot.command()
 @is_admin_or_owner()
 async def check_warr(ctx, user: discord.User, order_id: str):
     try:
-        headers = {
-            'Authorization': f'Bearer {config["SELLIX_API_KEY"]}',
-            'Content-Type': 'application/json',
-        }
-        url = f'https://dev.sellix.io/v1/orders/{order_id}'
-        response = requests.get(url, headers=headers)
+        order, status = await asyncio.to_thread(fetch_order, order_id)
+        if status == "not_found":
+            await ctx.send(embed=create_embed("Error", f"**The order ID `{order_id}` was not found.** Please check the order ID and try again.", discord.Color.red()))
+            return
+        if status != "ok":
+            await ctx.send(embed=create_embed("Error", "An unexpected error occurred while checking the order ID. Please try again later.", discord.Color.red()))
+            return
 
-        if response.status_code == 200:
-            response_data = response.json()
-            if response_data.get('status') == 404:
-                await ctx.send(embed=create_embed("Error", f"**The order ID `{order_id}` was not found.** Please check the order ID and try again.", discord.Color.red()))
-                return
+        product_id = order.product_id
+        product_title = order.product_title
+        quantity = order.quantity
+        total_price = order.total_price
+        completed_at = datetime.fromtimestamp(order.created_at, tz=timezone.utc)
+
+        # Get warranty duration from product.json
+        products = load_json(config["PRODUCT_DIR"])
+        if product_id not in products:
+            await ctx.send(embed=create_embed("Error", f"Product ID `{product_id}` not found in the product list.", discord.Color.red()))
+            return
 
-            order_data = response_data.get('data', {}).get('order', {})
-            product_id = order_data.get('product_id')
-            product_title = order_data.get('product_title', 'Unknown Product')
-            quantity = order_data.get('quantity', 'Unknown Quantity')
-            total_price = float(order_data.get('total', 0.0))
-            currency = order_data.get('currency', '$')
-            stored_email = order_data.get('customer_email', '')
+        warranty_duration = products[product_id].get("warranty_duration")
 
-            created_at_timestamp = order_data.get('created_at')
-            completed_at = datetime.fromtimestamp(created_at_timestamp, tz=timezone.utc)
+        if not warranty_duration:
+            await ctx.send(embed=create_embed("Error", "Could not determine warranty duration for this product.", discord.Color.red()))
+            return
 
-            # Load product data
-            products = load_json(config["PRODUCT_DIR"])
+        now = datetime.now(timezone.utc)
+        warranty_end = get_warranty_end(completed_at, warranty_duration)
 
-            if product_id not in products:
-                await ctx.send(embed=create_embed("Error", f"Product ID `{product_id}` not found in the product list.", discord.Color.red()))
-                return
+        # Check Vouch
+        vouch_channel = await ensure_vouch_index(ctx.guild)
+        if not vouch_channel:
+            await ctx.send(embed=create_embed("Error", "Vouch channel not found.", discord.Color.red()))
+            return
+        vouch_found = vouch_ledger.find(order_id, user.id, product_id, product_title, total_price) is not None
+
+        # Check Web Review
+        five_star_review = order_id in await fetch_five_star_invoices([order_id])
+
+        # Intelligent Messaging
+        if now > warranty_end:
+            await ctx.send(embed=create_embed("Warranty Expired", f"Your warranty for the order ID `{order_id}` has expired. Warranty duration was `{warranty_duration}` and the order was completed on `{completed_at.strftime('%Y-%m-%d %H:%M:%S')}`.", discord.Color.red()))
+        elif not vouch_found and not five_star_review:
+            await ctx.send(embed=create_embed("Action Required", f"You did not vouch or leave a 5-star review on Sellix. Please do both within 24 hours to activate your warranty:\n\n"
+                                                                f"1. **Vouch** with the following message in the designated channel:\n"
+                                                                f"```+rep <@{config['OWNER_ID']}> {product_title} {quantity}x ${total_price}```\n"
+                                                                f"2. **Leave a 5-star review** [here](https://{config['SHOP_LINK']}/invoice/{order_id})", discord.Color.red()))
+        elif not vouch_found:
+            await ctx.send(embed=create_embed("Vouch Required", f"You left a 5-star review on Sellix, but did not vouch in the proper format. "
+                                                                f"Please vouch with the following message within 24 hours to activate your warranty:\n\n"
+                                                                f"```+rep <@{config['OWNER_ID']}>  {product_title} {quantity}x ${total_price} ```", discord.Color.red()))
+        elif not five_star_review:
+            await ctx.send(embed=create_embed("Review Required", f"You vouched in the proper format, but did not leave a 5-star review on Sellix. "
+                                                                 f"Please leave a 5-star review within 24 hours to activate your warranty:\n\n"
+                                                                 f"[Leave a 5-star review](https://{config['SHOP_LINK']}/invoice/{order_id})", discord.Color.red()))
+        else:
+            await ctx.send(embed=create_embed("Warranty Valid", f"Your warranty for the order ID `{order_id}` is still valid and will end on `{warranty_end.strftime('%Y-%m-%d %H:%M:%S')}`. Thank you for vouching and leaving a review!"))
 
-            # Get warranty duration from product.json
-            product_info = products.get(product_id, {})
-            warranty_duration = product_info.get('warranty_duration')
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An unexpected error occurred. Please try again later.", discord.Color.red()))
 
-            if not warranty_duration:
-                await ctx.send(embed=create_embed("Error", "Could not determine warranty duration for this product.", discord.Color.red()))
-                return
+@bot.command()
+@is_admin_or_owner()
+async def vouch_report(ctx):
+    try:
+        if not await ensure_vouch_index(ctx.guild):
+            await ctx.send(embed=create_embed("Error", "Vouch channel not found.", discord.Color.red()))
+            return
 
-            duration_amount, duration_type = int(warranty_duration[:-1]), warranty_duration[-1]
-            now = datetime.now(timezone.utc)
-            if duration_type == 'd':
-                warranty_end = completed_at + timedelta(days=duration_amount)
-            elif duration_type == 'm':
-                warranty_end = completed_at + timedelta(days=duration_amount * 30)
-            elif duration_type == 'y':
-                warranty_end = completed_at + timedelta(days=duration_amount * 365)
-            else:
-                warranty_end = completed_at  # Handle lifetime or other cases as needed
-
-            # Check Vouch
-            vouch_channel = ctx.guild.get_channel(int(config["VOUCH_CHANNEL_ID"]))
-            vouch_found = False
-            async for message in vouch_channel.history(limit=1000):
-                if message.author == user and f"<@{config['OWNER_ID']}>" in message.content:
-                    vouch_content = message.content.lower()
-                    vouch_price_match = re.search(r'\$\d+(\.\d{1,2})?', vouch_content)
-                    if vouch_price_match:
-                        vouch_price = float(vouch_price_match.group()[1:])
-                        if abs(vouch_price - total_price) <= 1.0:
-                            vouch_words = vouch_content.split()
-                            title_words = product_title.lower().split()
-                            matches = [word for word in title_words if word in vouch_words]
-                            if len(matches) >= 2:
-                                vouch_found = True
-                                break
-
-            # Check Web Review
-            review_url = 'https://dev.sellix.io/v1/feedback'
-            review_response = requests.get(review_url, headers=headers)
-
-            if review_response.status_code == 200:
-                feedback_data = review_response.json().get('data', {}).get('feedback', [])
-                five_star_review = any(feedback.get('invoice_id') == order_id and feedback.get('score') == 5 for feedback in feedback_data)
-            else:
-                five_star_review = False
-
-            # Intelligent Messaging
-            if now > warranty_end:
-                await ctx.send(embed=create_embed("Warranty Expired", f"Your warranty for the order ID `{order_id}` has expired. Warranty duration was `{warranty_duration}` and the order was completed on `{completed_at.strftime('%Y-%m-%d %H:%M:%S')}`.", discord.Color.red()))
-            elif not vouch_found and not five_star_review:
-                await ctx.send(embed=create_embed("Action Required", f"You did not vouch or leave a 5-star review on Sellix. Please do both within 24 hours to activate your warranty:\n\n"
-                                                                    f"1. **Vouch** with the following message in the designated channel:\n"
-                                                                    f"```+rep <@{config['OWNER_ID']}> {product_title} {quantity}x ${total_price}```\n"
-                                                                    f"2. **Leave a 5-star review** [here](https://{config['SHOP_LINK']}/invoice/{order_id})", discord.Color.red()))
-            elif not vouch_found:
-                await ctx.send(embed=create_embed("Vouch Required", f"You left a 5-star review on Sellix, but did not vouch in the proper format. "
-                                                                    f"Please vouch with the following message within 24 hours to activate your warranty:\n\n"
-                                                                    f"```+rep <@{config['OWNER_ID']}>  {product_title} {quantity}x ${total_price} ```", discord.Color.red()))
-            elif not five_star_review:
-                await ctx.send(embed=create_embed("Review Required", f"You vouched in the proper format, but did not leave a 5-star review on Sellix. "
-                                                                     f"Please leave a 5-star review within 24 hours to activate your warranty:\n\n"
-                                                                     f"[Leave a 5-star review](https://{config['SHOP_LINK']}/invoice/{order_id})", discord.Color.red()))
-            else:
-                await ctx.send(embed=create_embed("Warranty Valid", f"Your warranty for the order ID `{order_id}` is still valid and will end on `{warranty_end.strftime('%Y-%m-%d %H:%M:%S')}`. Thank you for vouching and leaving a review!"))
+        unmatched_vouches = vouch_ledger.unmatched_vouches()
+        unmatched_orders = sorted(vouch_ledger.unmatched_orders.items(), key=lambda item: item[1]["checked_at"], reverse=True)
 
-        else:
-            await ctx.send(embed=create_embed("Error", "An unexpected error occurred while checking the order ID. Please try again later.", discord.Color.red()))
+        embed = create_embed("Vouch Report", f"**Linked vouches:** {len(vouch_ledger.links)}\n"
+                                             f"**Unmatched vouches:** {len(unmatched_vouches)}\n"
+                                             f"**Orders without a vouch:** {len(unmatched_orders)}")
+        if unmatched_vouches:
+            embed.add_field(
+                name="Latest Unmatched Vouches",
+                value="\n".join(f"<@{vouch.user_id}> ${vouch.price} [jump]({vouch_ledger.jump_url(vouch)})" for vouch in unmatched_vouches[-8:]),
+                inline=False
+            )
+        if unmatched_orders:
+            embed.add_field(
+                name="Latest Orders Without a Vouch",
+                value="\n".join(f"`{order_id}` <@{order['user_id']}> {order['product'][:40]} ${order['total_price']}" for order_id, order in unmatched_orders[:8]),
+                inline=False
+            )
+        await ctx.send(embed=embed)
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
+
+@bot.listen('on_message')
+async def track_vouch(message):
+    if message.channel.id == int(config["VOUCH_CHANNEL_ID"]):
+        vouch = parse_vouch(message.id, message.author.id, message.content)
+        if vouch:
+            vouch_ledger.apply(message.id, vouch)
+
+@bot.listen('on_raw_message_edit')
+async def track_vouch_edit(payload):
+    # Raw edits also cover messages that are no longer in the message cache
+    if payload.channel_id != int(config["VOUCH_CHANNEL_ID"]) or "content" not in payload.data:
+        return
+
+    author_id = payload.data.get("author", {}).get("id")
+    if author_id is None:
+        return
+    vouch_ledger.apply(payload.message_id, parse_vouch(payload.message_id, int(author_id), payload.data["content"]))
+
+@bot.listen('on_raw_message_delete')
+async def forget_vouch(payload):
+    if payload.channel_id == int(config["VOUCH_CHANNEL_ID"]):
+        vouch_ledger.apply(payload.message_id, None)
+
+@bot.command()
+@is_admin_or_owner()
+async def pool_stats(ctx):
+    try:
+        def describe(samples):
+            if not samples:
+                return "No samples yet"
+            samples_ms = [sample * 1000 for sample in samples]
+            return f"**{len(samples_ms)}** samples • avg `{statistics.mean(samples_ms):.0f}ms` • median `{statistics.median(samples_ms):.0f}ms` • max `{max(samples_ms):.0f}ms`"
+
+        embed = create_embed("Ticket Pool", f"**Pooled channels:** {len(ticket_pool.channel_ids)}/{ticket_pool.size}")
+        embed.add_field(name="Claimed From Pool", value=describe(ticket_pool.claim_latency), inline=False)
+        embed.add_field(name="Created On Demand", value=describe(ticket_pool.create_latency), inline=False)
+        await ctx.send(embed=embed)
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
+
+@bot.command()
+@is_admin_or_owner()
+async def memory(ctx):
+    try:
+        embed = create_embed("Memory Usage", "Approximate size of the bot's in-memory caches")
+        total_bytes = 0
+        for name, cache in caches.items():
+            total_bytes += cache.bytes
+            embed.add_field(
+                name=name.capitalize(),
+                value=f"**{len(cache)}** entries • `{cache.bytes / 1024:.1f}` / `{cache.budget / 1024:.0f}` KB • {cache.evictions} evicted",
+                inline=False
+            )
 
-    except Exception as e:
-        await ctx.send(embed=create_embed("Error", f"An unexpected error occurred: {str(e)}", discord.Color.red()))
+        # Bounded by count or retention policy rather than a byte budget; vouch links are never evicted
+        for name, entries in (
+            ("Recent events", ring_handler.snapshot()),
+            ("Transcript index", transcript_archive.entries),
+            ("Vouch links", vouch_ledger.links),
+            ("Unmatched orders", vouch_ledger.unmatched_orders)
+        ):
+            size = approx_size(entries)
+            total_bytes += size
+            embed.add_field(name=name, value=f"**{len(entries)}** entries • `{size / 1024:.1f}` KB", inline=False)
+
+        embed.description += f"\n**Total:** `{total_bytes / 1024:.1f}` KB"
+        await ctx.send(embed=embed)
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
 
 @bot.event
 async def on_guild_channel_delete(channel):
+    ticket_pool.discard(channel.id)
     try:
         if "🔁〢pending-" in channel.name:
             tickets = load_json(config["TICKET_DIR"])
 
-            ticket_info = next((info for oid, info in tickets.items() if info['channel_id'] == channel.id), None)
+            ticket_orders = [oid for oid, info in tickets.items() if info['channel_id'] == channel.id]
 
-            if not ticket_info:
+            if not ticket_orders:
                 return
+            ticket_info = tickets[ticket_orders[0]]
 
             user = bot.get_user(ticket_info['user_id'])
             if not user:
@@ -698,22 +1450,23 @@ async def on_guild_channel_delete(channel):
             if transcript is None:
                 return 
 
-            transcript_file = discord.File(io.BytesIO(transcript.encode()), filename=f"{channel.name}_transcript.html")
+            entry = await asyncio.to_thread(transcript_archive.store, transcript, "ticket", channel.name, user.id, order_ids=ticket_orders)
 
             dm_channel = user.dm_channel
             if dm_channel is None:
                 dm_channel = await user.create_dm()
 
-            await dm_channel.send(file=transcript_file)
+            await dm_channel.send(file=await asyncio.to_thread(transcript_archive.to_file, entry))
             archive_channel = bot.get_channel(int(config["LOG_CHANNEL_ID"]))
             if archive_channel:
-                await archive_channel.send(f"Ticket `{channel.name}` has been closed. Here is the transcript:", file=transcript_file)
+                await archive_channel.send(f"Ticket `{channel.name}` has been closed. Here is the transcript:", file=await asyncio.to_thread(transcript_archive.to_file, entry))
 
-            tickets.pop(ticket_info['order_id'], None)
+            for oid in ticket_orders:
+                tickets.pop(oid, None)
             save_json(config["TICKET_DIR"], tickets)
 
-    except Exception as e:
-        print(f"An error occurred during channel deletion handling: {str(e)}")
+    except Exception:
+        log.exception("Failed to archive deleted ticket channel %s", channel.name)
 
 
 @tasks.loop(hours=1)
@@ -741,11 +1494,49 @@ async def scrape_products():
                     }
 
             save_json(config["PRODUCT_DIR"], existing_products)
-            print('Products updated and saved to products.json')
+            vouch_ledger.index_products(existing_products)
+            log.info("Products updated and saved to %s", config["PRODUCT_DIR"])
         else:
-            print(f"Failed to fetch products: {response.status_code}")
-    except Exception as e:
-        print(f"An error occurred during the scraping process: {str(e)}")
+            log.warning("Failed to fetch products: HTTP %s", response.status_code)
+    except Exception:
+        log.exception("An error occurred during the scraping process")
+
+@tasks.loop(minutes=10)
+async def refill_ticket_pool():
+    for guild in bot.guilds:
+        ticket_pool.schedule_refill(guild)
+
+@tasks.loop(hours=24)
+async def compact_transcripts():
+    try:
+        dropped_entries, removed_blobs = await asyncio.to_thread(transcript_archive.compact)
+        if dropped_entries or removed_blobs:
+            log.info("Transcript archive compacted: %s entries dropped, %s blobs removed", dropped_entries, removed_blobs)
+    except Exception:
+        log.exception("An error occurred while compacting the transcript archive")
+
+@tasks.loop(seconds=int(config.get("LOG_DIGEST_INTERVAL", 60)))
+async def flush_log_digest():
+    lines, dropped = digest_handler.drain()
+    if not lines:
+        return
+
+    archive_channel = bot.get_channel(int(config["LOG_CHANNEL_ID"]))
+    if not archive_channel:
+        return
+
+    # Repeated events (e.g. a Sellix outage) collapse into a single counted line
+    digest = "\n".join(f"{count}x {line}" if count > 1 else line for line, count in Counter(lines).most_common())
+    if len(digest) > 1900:
+        digest = digest[:1900].rsplit("\n", 1)[0] + "\n..."
+    summary = f"{len(lines)} event(s) in the last {int(flush_log_digest.seconds)}s"
+    if dropped:
+        summary += f", {dropped} older event(s) dropped"
+
+    try:
+        await archive_channel.send(f"**Log digest** ({summary})\n```{digest}```")
+    except discord.HTTPException:
+        digest_log.warning("Failed to deliver log digest", exc_info=True)
 
 @bot.command()
 @is_admin_or_owner()
@@ -760,19 +1551,56 @@ async def remove_product(ctx, product_id: str):
 
             save_json(config["PRODUCT_DIR"], products)
             save_json(config["EXCLUDED_DIR"], excluded_products)
+            vouch_ledger.index_products(products)
 
             await ctx.send(embed=create_embed("Product Removed", f"Product with ID `{product_id}` has been removed and will not be added back."))
         else:
             await ctx.send(embed=create_embed("Error", f"Product with ID `{product_id}` not found in the list.", discord.Color.red()))
-    except Exception as e:
-        await ctx.send(embed=create_embed("Error", f"An error occurred: {str(e)}", discord.Color.red()))
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
+
+@bot.command()
+@is_admin_or_owner()
+async def logs(ctx, count: int = 10):
+    try:
+        events = ring_handler.snapshot()[-max(1, min(count, 25)):]
+        if not events:
+            await ctx.send(embed=create_embed("Recent Events", "No events have been recorded yet."))
+            return
+
+        embed = create_embed("Recent Events", f"Last {len(events)} event(s)")
+        # Newest first, stopping before the embed passes Discord's 6000 character limit
+        for event in reversed(events):
+            context = " ".join(f"{field}={event[field]}" for field in ("order_id", "user_id", "command") if field in event)
+            name = f"{event['time']} • {event['level']}"
+            value = f"{event['message'][:200]}\n{context[:100]}".strip()
+            if len(embed) + len(name) + len(value) > 5500:
+                break
+            embed.add_field(name=name, value=value, inline=False)
+        await ctx.send(embed=embed)
+    except Exception:
+        log.exception("Command .%s failed", ctx.command, extra={"command": str(ctx.command)})
+        await ctx.send(embed=create_embed("Error", "An error occurred. Please try again later.", discord.Color.red()))
 
 @bot.event
 async def on_ready():
     bot.add_view(ReplaceView())
-    print(f'{bot.user} has connected to Discord!')
-    scrape_products.start()
+    log.info("%s has connected to Discord!", bot.user)
+    if not scrape_products.is_running():
+        scrape_products.start()
+    if not flush_log_digest.is_running():
+        flush_log_digest.start()
+    if not compact_transcripts.is_running():
+        compact_transcripts.start()
+    if not refill_ticket_pool.is_running():
+        refill_ticket_pool.start()
+    for guild in bot.guilds:
+        await ensure_vouch_index(guild)
     await bot.change_presence(status=discord.Status.dnd, activity=discord.Game(config["BOT_STATUS"]))
 
 os.makedirs("stock", exist_ok=True)
-bot.run(config['TOKEN'])
+try:
+    bot.run(config['TOKEN'], log_handler=None)
+finally:
+    log_listener.stop()